@@ -1,39 +1,49 @@
 #!/usr/bin/env python3
 """
-Add qr_code fields to events.yaml for events that have URLs
+Add qr_code fields to events.yaml for events that have URLs,
+generating any QR code images that don't exist yet
 """
 import yaml
 import os
-import re
 from datetime import datetime
 
+from generate_qrcodes import generate_qr_code, generate_qr_filename
+from events_yaml import dump_events
+
+# Use the LibYAML C bindings when PyYAML was built with them (the PyPI wheels
+# are) - they're much faster than the pure Python loader
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 # Project root is one level up from scripts/
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 
-def slugify(text):
-    """Convert event title to filename slug"""
-    text = text.lower()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_-]+', '-', text)
-    return text.strip('-')
-
 def main():
     print("Adding QR code fields to events.yaml\n")
 
     events_file = os.path.join(PROJECT_ROOT, 'data/events.yaml')
 
+    # Create qrcodes directory if needed
+    qrcodes_dir = os.path.join(PROJECT_ROOT, 'images/qrcodes')
+    os.makedirs(qrcodes_dir, exist_ok=True)
+    existing = set(os.listdir(qrcodes_dir))
+
     # Load events
     with open(events_file, 'r') as f:
-        events = yaml.safe_load(f)
+        events = yaml.load(f, Loader=SafeLoader)
 
     print(f"Found {len(events)} events\n")
 
     updated_count = 0
+    generated_count = 0
     skipped_count = 0
+    failed_count = 0
 
     # Add qr_code field to events with URLs
-    for event in events:
+    for idx, event in enumerate(events, 1):
         title = event['title']
         url = event.get('url')
 
@@ -42,35 +52,49 @@ def main():
             skipped_count += 1
             continue
 
-        # Generate QR code path
-        slug = slugify(title)
-        qr_code_path = f"images/qrcodes/event-{slug}-qr.png"
+        # Same filename generate_qrcodes.py uses for events
+        filename = generate_qr_filename(event, idx, 'events', qrcodes_dir)
+
+        # Generate the QR code image if it doesn't exist yet
+        if os.path.basename(filename) not in existing:
+            if not generate_qr_code(url, filename):
+                print(f"✗ {title}: Failed to generate QR code")
+                failed_count += 1
+                continue
+            existing.add(os.path.basename(filename))
+            generated_count += 1
+
+        # Only touch events whose qr_code field actually changes
+        qr_code_path = os.path.relpath(filename, PROJECT_ROOT)
+        if event.get('qr_code') == qr_code_path:
+            continue
 
-        # Add qr_code field
         event['qr_code'] = qr_code_path
 
         print(f"✓ {title}")
         print(f"  QR code: {qr_code_path}")
         updated_count += 1
 
-    # Save updated events.yaml
-    print(f"\nUpdating {events_file}...")
+    # Save updated events.yaml - skipped entirely when nothing changed
+    if updated_count:
+        print(f"\nUpdating {events_file}...")
 
-    with open(events_file, 'w') as f:
-        # Write header comment
-        f.write("# Louisville Colorado Events\n")
-        f.write(f"# Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"# Total events: {len(events)}\n\n")
+        with open(events_file, 'w') as f:
+            # Write header comment
+            f.write("# Louisville Colorado Events\n")
+            f.write(f"# Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"# Total events: {len(events)}\n\n")
 
-        # Write events with proper YAML formatting
-        yaml.dump(events, f,
-                  default_flow_style=False,
-                  allow_unicode=True,
-                  sort_keys=False,
-                  width=120)
+            # Write events with proper YAML formatting
+            dump_events(events, f, width=120)
+    else:
+        print(f"\nNo changes - {events_file} is already up to date")
 
     print(f"\n✓ Updated {updated_count} events with QR code fields")
+    print(f"✓ Generated {generated_count} QR code images")
     print(f"⚠ Skipped {skipped_count} events without URLs")
+    if failed_count:
+        print(f"✗ Failed to generate {failed_count} QR codes")
 
 if __name__ == '__main__':
     main()
@@ -4,6 +4,7 @@ Convert all background images to grayscale
 """
 from PIL import Image
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 def convert_to_grayscale(image_path):
@@ -15,12 +16,15 @@ def convert_to_grayscale(image_path):
         # Convert to grayscale
         grayscale_img = img.convert('L')
 
-        # Convert back to RGB mode so it's still a "color" image (but gray)
-        # This preserves compatibility with systems expecting RGB
-        rgb_grayscale = grayscale_img.convert('RGB')
-
-        # Save back to the same file
-        rgb_grayscale.save(image_path, quality=95)
+        if image_path.suffix.lower() in ('.jpg', '.jpeg'):
+            # JPEG stores grayscale natively, so save the single channel
+            # directly - smaller file and no RGB round-trip
+            grayscale_img.save(image_path, quality=95, optimize=True)
+        else:
+            # Other formats stay in RGB mode so it's still a "color" image (but gray)
+            # This preserves compatibility with systems expecting RGB
+            rgb_grayscale = Image.merge('RGB', (grayscale_img, grayscale_img, grayscale_img))
+            rgb_grayscale.save(image_path, quality=95, optimize=True)
 
         print(f"✓ Converted: {image_path.name}")
 
@@ -49,9 +53,9 @@ def main():
     print(f"Found {len(image_files)} images to convert...")
     print()
 
-    # Convert each image
-    for image_file in sorted(image_files):
-        convert_to_grayscale(image_file)
+    # Convert images in parallel - each conversion is independent and CPU-bound
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(executor.map(convert_to_grayscale, sorted(image_files)))
 
     print()
     print("Done!")
@@ -0,0 +1,35 @@
+"""
+Writing events.yaml, shared by scrape_events.py and add_event_qrcodes.py
+"""
+from typing import Dict, List
+import yaml
+
+# Use the LibYAML C bindings when PyYAML was built with them (the PyPI wheels
+# are) - they're much faster than the pure Python dumper
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
+# Number of events serialized per yaml.dump() call when saving
+YAML_DUMP_CHUNK_SIZE = 50
+YAML_DUMP_OPTIONS = {'default_flow_style': False, 'allow_unicode': True, 'sort_keys': False}
+
+
+def dump_events(events: List[Dict], f, **dump_options):
+    """
+    Write events to f as a single YAML list, in chunks of YAML_DUMP_CHUNK_SIZE events
+
+    Consecutive block sequences concatenate into one list, so the output is
+    the same as dumping the whole list - without building it all in memory.
+    dump_options override YAML_DUMP_OPTIONS (e.g. width=120).
+    """
+    options = {**YAML_DUMP_OPTIONS, **dump_options}
+
+    if not events:
+        yaml.dump(events, f, Dumper=SafeDumper, **options)
+        return
+
+    for start in range(0, len(events), YAML_DUMP_CHUNK_SIZE):
+        chunk = events[start:start + YAML_DUMP_CHUNK_SIZE]
+        yaml.dump(chunk, f, Dumper=SafeDumper, **options)
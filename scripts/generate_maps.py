@@ -3,27 +3,92 @@
 Generate map images for Louisville businesses using staticmap library
 """
 import yaml
-import urllib.request
-import urllib.parse
 import time
 import os
 import re
 import json
 import hashlib
-import glob
 import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
 from staticmap import StaticMap, IconMarker
 from PIL import Image, ImageDraw
 
+# Use the LibYAML C bindings when PyYAML was built with them (the PyPI wheels
+# are) - they're much faster than the pure Python loader
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 # Project root is one level up from scripts/
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 
+# Geocoding results keyed by cleaned address, persisted between runs so
+# Nominatim is only queried for addresses we haven't seen before
+GEOCODE_CACHE_FILE = os.path.join(PROJECT_ROOT, 'data/geocode_cache.json')
+GEOCODE_CACHE = {}
+
+# Nominatim allows at most 1 request per second
+NOMINATIM_MIN_INTERVAL = 1.0
+_nominatim_lock = threading.Lock()
+_nominatim_next_request = 0.0
+
+# Failed Nominatim requests are retried in get_coordinates() rather than by
+# the HTTP adapter, so every attempt goes through wait_for_nominatim()
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_RETRIES = 3
+NOMINATIM_RETRY_STATUSES = {429, 502, 503, 504}
+
+# Maps are rendered in the background while the next address is geocoded.
+# Each render already downloads its tiles with 4 threads, so keep this small
+# to stay within the OpenStreetMap tile usage policy.
+MAP_RENDER_WORKERS = 4
+
+# Shared HTTP session for Nominatim and map tiles, so requests reuse
+# connections. Sized for every render thread downloading tiles at once.
+# No adapter-level retries: staticmap already tries each tile 3 times, and
+# retries here would skip the Nominatim rate limit.
+_SESSION = requests.Session()
+_SESSION.headers.update({'User-Agent': 'Louisville-Kiosk/1.0'})
+_SESSION.mount('https://', HTTPAdapter(pool_maxsize=MAP_RENDER_WORKERS * 4, max_retries=0))
+
+# Downloaded OSM tiles are kept on disk so maps of nearby locations (which
+# is all of them, in Louisville) don't download the same tiles again
+TILE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'louisville-kiosk-tiles')
+TILE_CACHE_MAX_AGE = 7 * 24 * 60 * 60  # seconds
+
+# Pin marker PNG, rendered once on first use
+_pin_lock = threading.Lock()
+_pin_path = None
+
+# Slug patterns, compiled once since slugify runs for every item
+_NON_WORD_RE = re.compile(r'[^\w\s-]')
+_SEPARATOR_RE = re.compile(r'[\s_-]+')
+
+# Secondary address components, e.g. ", Ste 1", ", Unit D", ", Suite 120", ", Apt 5"
+_SUITE_RE = re.compile(r',?\s+(Suite|Ste|Unit|Apartment|Apt|Room|Rm|Office|Ofc)\.?\s+[\w\d-]+', re.IGNORECASE)
+# Unit numbers like " #225"
+_HASH_UNIT_RE = re.compile(r',?\s+#\s*[\w\d-]+', re.IGNORECASE)
+# Hwy -> Highway
+_HWY_RE = re.compile(r'\bHwy\b', re.IGNORECASE)
+
+# An event address with a state or ZIP is complete; otherwise it gets the
+# event location appended before geocoding
+_COMPLETE_ADDRESS_RE = re.compile(r'\bCO\b|80027')
+
+# Map filenames are "<slug>-<address hash>-map.jpg"
+_MAP_FILE_RE = re.compile(r'^(?P<slug>.+)-[0-9a-f]{8}-map\.jpg$')
+
 def slugify(text):
     """Convert business name to filename slug"""
     text = text.lower()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_-]+', '-', text)
+    text = _NON_WORD_RE.sub('', text)
+    text = _SEPARATOR_RE.sub('-', text)
     return text.strip('-')
 
 def hash_address(address):
@@ -46,96 +111,216 @@ def clean_address(address):
     Best practice: geocode at the street/building level.
     """
     # Remove suite, unit, apartment, office, room numbers
-    # Patterns like ", Ste 1", ", Unit D", ", Suite 120", ", Apt 5", " #225"
-    patterns = [
-        r',?\s+(Suite|Ste|Unit|Apartment|Apt|Room|Rm|Office|Ofc)\.?\s+[\w\d-]+',
-        r',?\s+#\s*[\w\d-]+',
-    ]
-
-    cleaned = address
-    for pattern in patterns:
-        cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
+    cleaned = _SUITE_RE.sub('', address)
+    cleaned = _HASH_UNIT_RE.sub('', cleaned)
 
     # Expand common abbreviations that Nominatim doesn't handle well
-    # Hwy -> Highway
-    cleaned = re.sub(r'\bHwy\b', 'Highway', cleaned, flags=re.IGNORECASE)
+    cleaned = _HWY_RE.sub('Highway', cleaned)
 
     return cleaned.strip()
 
+def load_geocode_cache():
+    """Load cached geocoding results from disk"""
+    if not os.path.exists(GEOCODE_CACHE_FILE):
+        return {}
+
+    try:
+        with open(GEOCODE_CACHE_FILE, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠ Could not read geocode cache: {e}")
+        return {}
+
+    # JSON has no tuples; None marks an address Nominatim couldn't find
+    return {address: tuple(coords) if coords else None for address, coords in data.items()}
+
+def save_geocode_cache():
+    """Write the geocoding cache back to disk"""
+    # Write atomically so an interrupted run never leaves a truncated cache
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(GEOCODE_CACHE_FILE), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(GEOCODE_CACHE, f, indent=2, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp_path, GEOCODE_CACHE_FILE)
+    except OSError as e:
+        print(f"⚠ Could not save geocode cache: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+def wait_for_nominatim():
+    """Block until we're allowed to send the next Nominatim request"""
+    global _nominatim_next_request
+
+    with _nominatim_lock:
+        delay = _nominatim_next_request - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        _nominatim_next_request = time.monotonic() + NOMINATIM_MIN_INTERVAL
+
+def index_existing_maps(maps_dir):
+    """
+    List the maps directory once, grouping map files by slug.
+    Returns {slug: set of map file paths}
+    """
+    existing = {}
+    with os.scandir(maps_dir) as entries:
+        for entry in entries:
+            match = _MAP_FILE_RE.match(entry.name)
+            if match and entry.is_file():
+                existing.setdefault(match.group('slug'), set()).add(f"{maps_dir}/{entry.name}")
+    return existing
+
 def get_coordinates(address):
-    """Get coordinates from OpenStreetMap Nominatim API"""
+    """
+    Get coordinates from OpenStreetMap Nominatim API.
+
+    Results are cached by cleaned address, so only cache misses hit the API
+    (and are subject to the Nominatim rate limit).
+    """
     # Clean address before geocoding
     cleaned_address = clean_address(address)
 
     if cleaned_address != address:
         print(f"  Cleaned address: {cleaned_address}")
 
-    base_url = "https://nominatim.openstreetmap.org/search"
+    if cleaned_address in GEOCODE_CACHE:
+        coords = GEOCODE_CACHE[cleaned_address]
+        if coords:
+            return coords
+        print(f"  No results found for: {cleaned_address} (cached)")
+        return None, None
+
     params = {
         'q': cleaned_address,
         'format': 'json',
         'limit': 1
     }
 
-    url = f"{base_url}?{urllib.parse.urlencode(params)}"
-    headers = {'User-Agent': 'Louisville-Kiosk/1.0'}
-
     try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = response.read()
-            results = json.loads(data)
-
-            if results:
-                lat = float(results[0]['lat'])
-                lon = float(results[0]['lon'])
-                return lat, lon
-            else:
-                print(f"  No results found for: {cleaned_address}")
+        for attempt in range(NOMINATIM_RETRIES + 1):
+            if attempt:
+                time.sleep(2 ** (attempt - 1))  # back off on top of the rate limit
+            wait_for_nominatim()
+
+            try:
+                response = _SESSION.get(NOMINATIM_URL, params=params, timeout=10)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == NOMINATIM_RETRIES:
+                    raise
+                continue
+
+            if response.status_code not in NOMINATIM_RETRY_STATUSES:
+                break
+
+        response.raise_for_status()
+        results = response.json()
+
+        if results:
+            lat = float(results[0]['lat'])
+            lon = float(results[0]['lon'])
+            GEOCODE_CACHE[cleaned_address] = (lat, lon)
+            return lat, lon
+        else:
+            print(f"  No results found for: {cleaned_address}")
+            GEOCODE_CACHE[cleaned_address] = None
     except Exception as e:
+        # Don't cache errors - they're usually transient (e.g. HTTP 503)
         print(f"  Error getting coordinates for '{cleaned_address}': {e}")
 
     return None, None
 
 def create_pin_icon(size=48):
     """Create a red pin/pushpin icon for map markers"""
-    # Create a new image with transparency
-    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-
-    # Draw a pin shape (teardrop/marker shape)
     # Pin is centered at bottom middle of the image
     center_x = size // 2
     circle_radius = size // 3
+    inner_radius = circle_radius // 2
 
-    # Draw the circular top part of the pin
-    draw.ellipse(
-        [center_x - circle_radius, 0, center_x + circle_radius, circle_radius * 2],
-        fill=(220, 20, 60, 255),  # Crimson red
-        outline=(150, 0, 0, 255)   # Darker outline
-    )
-
-    # Draw the pointed bottom part (triangle)
-    draw.polygon(
-        [
-            (center_x - circle_radius // 2, circle_radius * 1.5),
-            (center_x + circle_radius // 2, circle_radius * 1.5),
-            (center_x, size - 2)
-        ],
-        fill=(220, 20, 60, 255),  # Crimson red
-        outline=(150, 0, 0, 255)   # Darker outline
-    )
+    # Circular top part and pointed bottom part (triangle) of the pin
+    top = [center_x - circle_radius, 0, center_x + circle_radius, circle_radius * 2]
+    point = [
+        (center_x - circle_radius // 2, circle_radius * 1.5),
+        (center_x + circle_radius // 2, circle_radius * 1.5),
+        (center_x, size - 2)
+    ]
 
-    # Draw a white circle in the center for visibility
-    inner_radius = circle_radius // 2
-    draw.ellipse(
+    # Draw the shapes into single-channel masks rather than compositing RGBA:
+    # one for the whole pin, one for its fill (everything except the outline)
+    # and one for the white circle in the center
+    # (ImageDraw skips the outline when it matches the fill, so draw it separately)
+    shape_mask = Image.new('L', (size, size), 0)
+    draw = ImageDraw.Draw(shape_mask)
+    draw.ellipse(top, fill=255)
+    draw.ellipse(top, outline=255)
+    draw.polygon(point, fill=255)
+    draw.polygon(point, outline=255)
+
+    fill_mask = Image.new('L', (size, size), 0)
+    draw = ImageDraw.Draw(fill_mask)
+    draw.ellipse(top, fill=255, outline=0)
+    draw.polygon(point, fill=255, outline=0)
+
+    center_mask = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(center_mask).ellipse(
         [center_x - inner_radius, circle_radius - inner_radius,
          center_x + inner_radius, circle_radius + inner_radius],
-        fill=(255, 255, 255, 255)
+        fill=255
     )
 
+    # Darker outline color, crimson red fill, white center, transparent elsewhere
+    img = Image.new('RGBA', (size, size), (150, 0, 0, 255))
+    img.paste((220, 20, 60, 255), mask=fill_mask)
+    img.paste((255, 255, 255, 255), mask=center_mask)
+    img.putalpha(shape_mask)
+
     return img
 
+def get_pin_path():
+    """Render the pin marker icon once and return the path to its PNG file"""
+    global _pin_path
+
+    with _pin_lock:
+        if _pin_path is None:
+            # Fixed path next to the tile cache, overwritten by each run
+            # rather than leaving a new temp file behind every time
+            os.makedirs(TILE_CACHE_DIR, exist_ok=True)
+            pin_file = os.path.join(TILE_CACHE_DIR, 'pin-marker.png')
+            tmp_file = f"{pin_file}.{os.getpid()}.tmp"
+            create_pin_icon(60).save(tmp_file, format='PNG')
+            os.replace(tmp_file, pin_file)
+            _pin_path = pin_file
+
+    return _pin_path
+
+class CachedStaticMap(StaticMap):
+    """StaticMap that caches downloaded tiles on disk"""
+
+    def get(self, url, **kwargs):
+        cache_file = os.path.join(TILE_CACHE_DIR, hashlib.md5(url.encode()).hexdigest() + '.png')
+
+        try:
+            if time.time() - os.path.getmtime(cache_file) < TILE_CACHE_MAX_AGE:
+                with open(cache_file, 'rb') as f:
+                    return 200, f.read()
+        except OSError:
+            pass
+
+        response = _SESSION.get(url, **kwargs)
+        status_code, content = response.status_code, response.content
+
+        if status_code == 200:
+            # Write to a temp file first - several render threads may fetch the same tile
+            os.makedirs(TILE_CACHE_DIR, exist_ok=True)
+            tmp_file = f"{cache_file}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_file, cache_file)
+
+        return status_code, content
+
 def generate_map_image(lat, lon, filename, business_name=None, zoom=18):
     """
     Generate map using staticmap library with pin markers.
@@ -152,22 +337,17 @@ def generate_map_image(lat, lon, filename, business_name=None, zoom=18):
         from PIL import ImageFont
 
         # Create map (800x600 output)
-        m = StaticMap(800, 600, url_template='https://tile.openstreetmap.org/{z}/{x}/{y}.png')
-
-        # Create and save pin marker to temporary file
-        pin_icon = create_pin_icon(60)
-        pin_path = '/tmp/map_pin.png'
-        pin_icon.save(pin_path)
+        m = CachedStaticMap(800, 600, url_template='https://tile.openstreetmap.org/{z}/{x}/{y}.png')
 
         # Add pin marker at the location
-        marker = IconMarker((lon, lat), pin_path, 30, 60)  # offset_x, offset_y to center pin point
+        marker = IconMarker((lon, lat), get_pin_path(), 30, 60)  # offset_x, offset_y to center pin point
         m.add_marker(marker)
 
         # Render map at specified zoom level
         image = m.render(zoom=zoom)
 
-        # Save to file
-        image.save(filename)
+        # Save to file - optimized progressive JPEG keeps files small for the kiosk
+        image.save(filename, format='JPEG', quality=85, optimize=True, progressive=True)
 
         return True
 
@@ -187,18 +367,21 @@ def main():
     print("Louisville Kiosk - Map Generator")
     print("Using staticmap library with OpenStreetMap tiles\n")
 
+    GEOCODE_CACHE.update(load_geocode_cache())
+    cached_addresses = len(GEOCODE_CACHE)
+
     # Load businesses data
     businesses_file = os.path.join(PROJECT_ROOT, 'data/businesses.yaml')
     events_file = os.path.join(PROJECT_ROOT, 'data/events.yaml')
 
     with open(businesses_file, 'r') as f:
-        businesses = yaml.safe_load(f)
+        businesses = yaml.load(f, Loader=SafeLoader)
 
     # Load events if file exists (unless --businesses-only flag is set)
     events = []
     if not args.businesses_only and os.path.exists(events_file):
         with open(events_file, 'r') as f:
-            events = yaml.safe_load(f) or []
+            events = yaml.load(f, Loader=SafeLoader) or []
 
     # Deduplicate events by (title, address) to avoid processing recurring events multiple times
     if events:
@@ -220,6 +403,13 @@ def main():
     success_count = 0
     fail_count = 0
 
+    # Existing map files, grouped by slug
+    existing_maps = index_existing_maps(maps_dir)
+
+    # Maps still to generate, keyed by cleaned address: [(name, filename), ...]
+    map_jobs = {}
+    queued_maps = set()
+
     # Process businesses
     print("=== PROCESSING BUSINESSES ===\n")
     for business in businesses:
@@ -239,44 +429,22 @@ def main():
         addr_hash = hash_address(address)
         filename = f"{maps_dir}/{slug}-{addr_hash}-map.jpg"
 
-        # Check if map already exists
-        if os.path.exists(filename):
+        # Check if map already exists (or is already queued)
+        if filename in existing_maps.get(slug, ()) or filename in queued_maps:
             if not args.quiet:
                 print(f"  ℹ Map already exists: {filename}")
                 print()
             success_count += 1
-            # No sleep needed for skipped items
             continue
 
         # Clean up old map files for this business (different address hash)
-        old_maps = glob.glob(f"{maps_dir}/{slug}-*-map.jpg")
-        for old_map in old_maps:
-            if old_map != filename:
-                os.remove(old_map)
-                print(f"  🗑 Removed old map: {old_map}")
-
-        # Get coordinates
-        lat, lon = get_coordinates(address)
-
-        if not lat or not lon:
-            print(f"  ✗ Could not get coordinates")
-            fail_count += 1
-            print()
-            continue
-
-        print(f"  Coordinates: {lat}, {lon}")
+        for old_map in sorted(existing_maps.pop(slug, ())):
+            os.remove(old_map)
+            print(f"  🗑 Removed old map: {old_map}")
 
-        # Generate map image with business name
-        if generate_map_image(lat, lon, filename, business_name=name):
-            file_size = os.path.getsize(filename)
-            print(f"  ✓ Map saved: {filename} ({file_size/1024:.1f} KB)")
-            success_count += 1
-        else:
-            print(f"  ✗ Failed to generate map")
-            fail_count += 1
-
-        # Be nice to the API (Nominatim usage policy)
-        time.sleep(1)
+        # Queue for geocoding, grouped by location
+        map_jobs.setdefault(clean_address(address), []).append((name, filename))
+        queued_maps.add(filename)
         print()
 
     # Process events
@@ -292,7 +460,7 @@ def main():
                 continue
 
             # If address is incomplete (no city/state), combine with location
-            if 'CO' not in address and '80027' not in address:
+            if not _COMPLETE_ADDRESS_RE.search(address):
                 location = event.get('location', 'Louisville, CO')
                 full_address = f"{address}, {location}"
                 if not args.quiet:
@@ -308,46 +476,67 @@ def main():
             addr_hash = hash_address(address)
             filename = f"{maps_dir}/{slug}-{addr_hash}-map.jpg"
 
-            # Check if map already exists
-            if os.path.exists(filename):
+            # Check if map already exists (or is already queued)
+            if filename in existing_maps.get(slug, ()) or filename in queued_maps:
                 if not args.quiet:
                     print(f"  ℹ Map already exists: {filename}")
                     print()
                 success_count += 1
-                # No sleep needed for skipped items
                 continue
 
             # Clean up old map files for this event (different address hash)
-            old_maps = glob.glob(f"{maps_dir}/{slug}-*-map.jpg")
-            for old_map in old_maps:
-                if old_map != filename:
-                    os.remove(old_map)
-                    print(f"  🗑 Removed old map: {old_map}")
+            for old_map in sorted(existing_maps.pop(slug, ())):
+                os.remove(old_map)
+                print(f"  🗑 Removed old map: {old_map}")
 
-            # Get coordinates
-            lat, lon = get_coordinates(address)
+            # Queue for geocoding, grouped by location
+            map_jobs.setdefault(clean_address(address), []).append((title, filename))
+            queued_maps.add(filename)
+            print()
 
-            if not lat or not lon:
-                print(f"  ✗ Could not get coordinates")
-                fail_count += 1
-                print()
-                continue
+    # Geocode each unique location once - businesses and events often share
+    # a building - and render its maps in the background while the next
+    # address is looked up
+    pending_maps = []
+    with ThreadPoolExecutor(max_workers=MAP_RENDER_WORKERS) as executor:
+        if map_jobs:
+            print(f"\n=== GEOCODING {len(map_jobs)} LOCATIONS ===\n")
+        try:
+            for address, jobs in map_jobs.items():
+                print(f"Geocoding: {address}")
+                lat, lon = get_coordinates(address)
+
+                if not lat or not lon:
+                    print(f"  ✗ Could not get coordinates")
+                    for name, filename in jobs:
+                        print(f"  ✗ No map for: {name}")
+                        fail_count += 1
+                    print()
+                    continue
 
-            print(f"  Coordinates: {lat}, {lon}")
+                print(f"  Coordinates: {lat}, {lon}")
 
-            # Generate map image with event title
-            if generate_map_image(lat, lon, filename, business_name=title):
+                for name, filename in jobs:
+                    future = executor.submit(generate_map_image, lat, lon, filename, business_name=name)
+                    pending_maps.append((filename, future))
+                print()
+        finally:
+            # Save new lookups once, even if geocoding was interrupted
+            if len(GEOCODE_CACHE) != cached_addresses:
+                save_geocode_cache()
+
+        # Wait for background map renders to finish
+        if pending_maps:
+            print(f"\n=== RENDERING {len(pending_maps)} MAPS ===\n")
+        for filename, future in pending_maps:
+            if future.result():
                 file_size = os.path.getsize(filename)
                 print(f"  ✓ Map saved: {filename} ({file_size/1024:.1f} KB)")
                 success_count += 1
             else:
-                print(f"  ✗ Failed to generate map")
+                print(f"  ✗ Failed to generate map: {filename}")
                 fail_count += 1
 
-            # Be nice to the API (Nominatim usage policy)
-            time.sleep(1)
-            print()
-
     print("=" * 60)
     print(f"Done! {success_count} maps generated, {fail_count} failed")
     print("=" * 60)
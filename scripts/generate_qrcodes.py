@@ -6,47 +6,47 @@ import yaml
 import os
 import re
 import glob
-import qrcode
-from PIL import Image
+import segno
+from concurrent.futures import ProcessPoolExecutor
+
+# Use the LibYAML C bindings when PyYAML was built with them (the PyPI wheels
+# are) - they're much faster than the pure Python loader
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 # Project root is one level up from scripts/
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 
+# Slug patterns, compiled once since slugify runs for every item
+_NON_WORD_RE = re.compile(r'[^\w\s-]')
+_SEPARATOR_RE = re.compile(r'[\s_-]+')
+
 def slugify(text):
     """Convert text to filename slug"""
     text = text.lower()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_-]+', '-', text)
+    text = _NON_WORD_RE.sub('', text)
+    text = _SEPARATOR_RE.sub('-', text)
     return text.strip('-')
 
 def generate_qr_code(url, filename):
     """
     Generate QR code image for a URL.
 
-    Uses the qrcode library with:
-    - High error correction (L level is fine for URLs)
+    Uses the segno library with:
+    - Low error correction (L level is fine for URLs)
     - Good size for kiosk display
     - White background, black foreground
     """
     try:
-        # Create QR code instance
-        qr = qrcode.QRCode(
-            version=1,  # Auto-size
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-
-        # Add data
-        qr.add_data(url)
-        qr.make(fit=True)
-
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
+        # Always a regular QR code - segno may otherwise pick Micro QR for
+        # short URLs, which phone cameras don't reliably scan
+        qr = segno.make_qr(url, error='L')
 
         # Save to file
-        img.save(filename)
+        qr.save(filename, kind='png', scale=10, border=4)
 
         return True
 
@@ -56,6 +56,11 @@ def generate_qr_code(url, filename):
         traceback.print_exc()
         return False
 
+def _generate_qr_job(job):
+    """Worker entry point for the process pool: job is a (url, filename) tuple"""
+    url, filename = job
+    return generate_qr_code(url, filename)
+
 def get_item_identifier(item, file_basename):
     """
     Extract a human-readable identifier from an item based on common fields.
@@ -111,7 +116,7 @@ def process_yaml_file(filepath, qrcodes_dir):
     file_basename = os.path.splitext(os.path.basename(filepath))[0]
 
     with open(filepath, 'r') as f:
-        items = yaml.safe_load(f)
+        items = yaml.load(f, Loader=SafeLoader)
 
     # Skip if not a list
     if not isinstance(items, list):
@@ -127,6 +132,13 @@ def process_yaml_file(filepath, qrcodes_dir):
     # For large files (>50 items), suppress individual item output
     verbose = len(items) < 50
 
+    # (url, filename) pairs that still need a QR code generated
+    worklist = []
+    queued = set()
+
+    # List the output directory once instead of checking each file
+    existing = set(os.listdir(qrcodes_dir))
+
     for idx, item in enumerate(items, 1):
         if not isinstance(item, dict):
             skip_count += 1
@@ -151,26 +163,36 @@ def process_yaml_file(filepath, qrcodes_dir):
         # Generate filename
         filename = generate_qr_filename(item, idx, file_basename, qrcodes_dir)
 
-        # Check if QR code already exists
-        if os.path.exists(filename):
+        # Check if QR code already exists (or is already queued)
+        if os.path.basename(filename) in existing or filename in queued:
             if verbose:
                 print(f"  ℹ QR code already exists: {filename}")
                 print()
             success_count += 1
             continue
 
-        # Generate QR code
-        if generate_qr_code(url, filename):
-            file_size = os.path.getsize(filename)
-            if verbose:
-                print(f"  ✓ QR code saved: {filename} ({file_size/1024:.1f} KB)")
-                print()
-            success_count += 1
-        else:
-            if verbose:
-                print(f"  ✗ Failed to generate QR code")
-                print()
-            fail_count += 1
+        worklist.append((url, filename))
+        queued.add(filename)
+        if verbose:
+            print()
+
+    # Generate the missing QR codes in parallel - encoding is CPU-bound
+    if worklist:
+        with ProcessPoolExecutor() as executor:
+            results = list(executor.map(_generate_qr_job, worklist))
+
+        for (url, filename), generated in zip(worklist, results):
+            if generated:
+                file_size = os.path.getsize(filename)
+                if verbose:
+                    print(f"  ✓ QR code saved: {filename} ({file_size/1024:.1f} KB)")
+                success_count += 1
+            else:
+                if verbose:
+                    print(f"  ✗ Failed to generate QR code: {filename}")
+                fail_count += 1
+        if verbose:
+            print()
 
     # For large files, print a summary
     if not verbose:
@@ -26,20 +26,29 @@ Data structure:
 }
 """
 import argparse
+import hashlib
 import json
 import os
 import sys
 import re
-import yaml
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from io import BytesIO
 from typing import List, Dict, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PIL import Image, ImageOps
+
+from events_yaml import dump_events
 
 # Add scrapers directory to Python path
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 SCRAPERS_DIR = os.path.join(SCRIPT_DIR, 'scrapers')
 sys.path.insert(0, SCRAPERS_DIR)
 
+from _dates import parse_iso_datetime
+
 # Project root is one level up from scripts/
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 
@@ -51,22 +60,82 @@ DEFAULT_EVENTS_IMAGE_DIR = os.environ.get('EVENTS_IMAGE_DIR', os.path.join(PROJE
 OUTPUT_FILE = DEFAULT_OUTPUT_FILE
 EVENTS_IMAGE_DIR = DEFAULT_EVENTS_IMAGE_DIR
 
+# Max number of event images downloaded at once
+IMAGE_DOWNLOAD_WORKERS = 16
+
+# Event images are downscaled to fit in this box and re-encoded as JPEG -
+# the kiosk never displays them any larger
+EVENT_IMAGE_MAX_SIZE = (1280, 1280)
+EVENT_IMAGE_JPEG_QUALITY = 85
+
+# Shared HTTP session so image downloads reuse connections (keep-alive),
+# with a connection per download worker and retries for flaky image hosts
+_SESSION = requests.Session()
+_SESSION.headers.update({'User-Agent': 'Louisville-Kiosk/1.0'})
+_ADAPTER = HTTPAdapter(
+    pool_connections=IMAGE_DOWNLOAD_WORKERS,
+    pool_maxsize=IMAGE_DOWNLOAD_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.5),
+)
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
+
+
+# Slug patterns, compiled once since slugify runs for every item
+_NON_WORD_RE = re.compile(r'[^\w\s-]')
+_SEPARATOR_RE = re.compile(r'[\s_-]+')
+
 
 def slugify(text):
     """Convert text to URL-friendly slug"""
-    import re
     text = text.lower()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[\s_-]+', '-', text)
+    text = _NON_WORD_RE.sub('', text)
+    text = _SEPARATOR_RE.sub('-', text)
     return text.strip('-')
 
 
 
 
+def decode_event_image(data: bytes) -> Optional[Image.Image]:
+    """
+    Decode downloaded image bytes into an RGB image no larger than EVENT_IMAGE_MAX_SIZE
+
+    Returns None if the data isn't an image PIL can read
+    """
+    try:
+        image = Image.open(BytesIO(data))
+        image.draft('RGB', EVENT_IMAGE_MAX_SIZE)  # Lets JPEGs decode at reduced scale
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(EVENT_IMAGE_MAX_SIZE, Image.Resampling.LANCZOS)
+    except Exception:
+        return None
+
+    # Flatten transparency onto white rather than letting it turn black
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+
+    return image.convert('RGB') if image.mode != 'RGB' else image
+
+
+def event_image_name(image_url: str, event_title: str) -> str:
+    """
+    Base filename (without extension) for an event's downloaded image
+
+    Includes a short hash of the image URL, so events that share a title
+    but not an image don't overwrite each other's files.
+    """
+    url_hash = hashlib.md5(image_url.encode()).hexdigest()[:8]
+    return f"{slugify(event_title)}-{url_hash}"
+
+
 def download_event_image(image_url: str, event_title: str) -> Optional[str]:
     """
     Download an event image and save it locally
 
+    Images already downloaded by an earlier run are reused as-is.
     Returns the local path to the image or None if download failed
     """
     if not image_url:
@@ -77,22 +146,32 @@ def download_event_image(image_url: str, event_title: str) -> Optional[str]:
         os.makedirs(EVENTS_IMAGE_DIR, exist_ok=True)
 
         # Generate filename
-        slug = slugify(event_title)
+        name = event_image_name(image_url, event_title)
         ext = image_url.split('.')[-1].split('?')[0]  # Get extension, remove query params
         if ext not in ['jpg', 'jpeg', 'png', 'gif', 'webp']:
             ext = 'jpg'
 
-        filename = f"{slug}.{ext}"
-        filepath = os.path.join(EVENTS_IMAGE_DIR, filename)
+        # Same URL, same file - skip the download
+        for filename in (f"{name}.jpg", f"{name}.{ext}"):
+            if os.path.exists(os.path.join(EVENTS_IMAGE_DIR, filename)):
+                return f"images/events/{filename}"
 
         # Download image
-        headers = {'User-Agent': 'Louisville-Kiosk/1.0'}
-        response = requests.get(image_url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        # Save image
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
+        with _SESSION.get(image_url, timeout=10) as response:
+            response.raise_for_status()
+            data = response.content
+
+        # Downscale and re-encode as JPEG - fall back to the original bytes
+        # if PIL can't decode the image
+        image = decode_event_image(data)
+        if image is None:
+            filename = f"{name}.{ext}"
+            with open(os.path.join(EVENTS_IMAGE_DIR, filename), 'wb') as f:
+                f.write(data)
+        else:
+            filename = f"{name}.jpg"
+            image.save(os.path.join(EVENTS_IMAGE_DIR, filename), 'JPEG',
+                       quality=EVENT_IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
 
         # Return relative path for JSON
         return f"images/events/{filename}"
@@ -102,6 +181,42 @@ def download_event_image(image_url: str, event_title: str) -> Optional[str]:
         return None
 
 
+def download_event_images(events: List[Dict]):
+    """
+    Download remote event images concurrently and point events at the local copies
+
+    Events whose download fails keep their original image URL.
+    """
+    # One download per filename - recurring events share a title (and image)
+    downloads = {}
+    for event in events:
+        image_url = event.get('image')
+        if image_url and image_url.startswith(('http://', 'https://')):
+            downloads.setdefault(event_image_name(image_url, event['title']), (image_url, event['title']))
+
+    if not downloads:
+        return
+
+    print(f"\nDownloading {len(downloads)} event images...")
+
+    with ThreadPoolExecutor(max_workers=IMAGE_DOWNLOAD_WORKERS) as executor:
+        futures = {
+            name: executor.submit(download_event_image, image_url, title)
+            for name, (image_url, title) in downloads.items()
+        }
+        local_paths = {name: future.result() for name, future in futures.items()}
+
+    for event in events:
+        image_url = event.get('image')
+        if image_url and image_url.startswith(('http://', 'https://')):
+            local_path = local_paths.get(event_image_name(image_url, event['title']))
+            if local_path:
+                event['image'] = local_path
+
+    downloaded = sum(1 for path in local_paths.values() if path)
+    print(f"  ✓ Downloaded {downloaded} of {len(downloads)} event images")
+
+
 def scrape_all_events() -> List[Dict]:
     """
     Scrape events from all configured sources
@@ -122,18 +237,26 @@ def scrape_all_events() -> List[Dict]:
         ('Eventbrite', scrape_eventbrite),
     ]
 
-    # Run each scraper
-    for scraper_name, scraper_func in scrapers:
-        print(f"\n{scraper_name}")
-        print("-" * 60)
-        try:
-            events = scraper_func()
-            all_events.extend(events)
-            print(f"  ✓ Added {len(events)} events from {scraper_name}")
-        except Exception as e:
-            print(f"  ✗ Error running {scraper_name}: {e}")
-            import traceback
-            traceback.print_exc()
+    # Run scrapers concurrently - each one is bound by its HTTP fetch, so their
+    # progress lines interleave; results are reported under [scraper name]
+    print(f"\nRunning {len(scrapers)} scrapers: {', '.join(name for name, _ in scrapers)}")
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(scrapers)) as executor:
+        futures = {executor.submit(scraper_func): scraper_name for scraper_name, scraper_func in scrapers}
+        for future in as_completed(futures):
+            scraper_name = futures[future]
+            try:
+                events = future.result()
+                results[scraper_name] = events
+                print(f"[{scraper_name}] ✓ Added {len(events)} events")
+            except Exception as e:
+                print(f"[{scraper_name}] ✗ Error running scraper: {e}")
+                import traceback
+                traceback.print_exc()
+
+    # Keep events in scraper order, regardless of which finished first
+    for scraper_name, _ in scrapers:
+        all_events.extend(results.get(scraper_name, []))
 
     print("\n" + "=" * 60)
     print(f"Total events scraped: {len(all_events)}")
@@ -149,11 +272,11 @@ def filter_future_events(events: List[Dict]) -> List[Dict]:
     """
     Filter events to only include those happening today or in the future
     """
-    from datetime import datetime, timezone
-
     now = datetime.now()
     # Set to start of today (midnight)
     today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    # Same moment in local time, for comparing event times that carry an offset
+    today_aware = today.astimezone()
 
     future_events = []
     past_count = 0
@@ -166,14 +289,10 @@ def filter_future_events(events: List[Dict]) -> List[Dict]:
                 continue
 
             # Parse ISO 8601 datetime
-            event_time = datetime.fromisoformat(event_time_str.replace('Z', '+00:00'))
-
-            # Remove timezone info for comparison if present
-            if event_time.tzinfo:
-                event_time = event_time.replace(tzinfo=None)
+            event_time = parse_iso_datetime(event_time_str)
 
             # Keep events happening today or later
-            if event_time >= today:
+            if event_time >= (today_aware if event_time.tzinfo else today):
                 future_events.append(event)
             else:
                 past_count += 1
@@ -201,7 +320,7 @@ def save_events(events: List[Dict]):
 
     with open(OUTPUT_FILE, 'w') as f:
         f.write(header)
-        yaml.dump(events, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+        dump_events(events, f)
 
     print(f"\n✓ Events saved to {OUTPUT_FILE}")
 
@@ -230,6 +349,9 @@ def main():
     # Scrape events from all sources
     events = scrape_all_events()
 
+    # Fetch event images so the kiosk serves them locally
+    download_event_images(events)
+
     # Save to JSON file
     save_events(events)
 
@@ -0,0 +1,17 @@
+"""
+Date helpers shared by the event scrapers and scrape_events.py
+"""
+import sys
+from datetime import datetime
+
+# datetime.fromisoformat() accepts a trailing 'Z' from Python 3.11
+_FROMISOFORMAT_HANDLES_Z = sys.version_info >= (3, 11)
+
+
+def parse_iso_datetime(text: str) -> datetime:
+    """
+    Parse an ISO 8601 datetime, including a trailing 'Z' for UTC
+    """
+    if not _FROMISOFORMAT_HANDLES_Z and text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    return datetime.fromisoformat(text)
@@ -0,0 +1,140 @@
+"""
+Shared HTTP session for the event scrapers
+
+One pooled requests.Session lets every scraper reuse connections (HTTP
+keep-alive) - the Chamber and Community calendars live on the same host,
+so the second scraper skips the TCP + TLS handshake entirely.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+# Connect / read timeouts in seconds
+TIMEOUT = (5, 15)
+
+# Set SCRAPER_DEBUG=1 to have the scrapers save the fetched HTML to /tmp
+DEBUG = bool(os.environ.get('SCRAPER_DEBUG'))
+
+# Browser-like headers - the Chamber site returns 403 to obvious bots
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    # gzip/deflate, plus br when the brotli package is installed to decode it
+    'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding'],
+    'Connection': 'keep-alive'
+}
+
+SESSION = requests.Session()
+SESSION.headers.update(DEFAULT_HEADERS)
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+)
+SESSION.mount('https://', _ADAPTER)
+SESSION.mount('http://', _ADAPTER)
+
+# ETag / Last-Modified validators and the parsed events from the last scrape
+# of each URL, so an unchanged page comes back as an empty 304 and skips
+# parsing entirely. Delete the file to force a full re-scrape.
+CACHE_FILE = os.environ.get('SCRAPER_CACHE_FILE', os.path.join(tempfile.gettempdir(), 'scraper_cache.json'))
+_cache_lock = threading.Lock()
+
+# Bump when the layout of cache entries changes
+CACHE_FORMAT = 1
+
+
+def source_version(path: str) -> str:
+    """
+    Short hash of a scraper's source file - passed as parser_version so
+    events cached by an older version of the parser are never reused
+    """
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def _entry_version(parser_version: str) -> str:
+    # Dates without a year are parsed relative to the current one, so a new
+    # year invalidates cached events too
+    return f"{CACHE_FORMAT}:{parser_version}:{datetime.now().year}"
+
+
+def _load_cache() -> Dict:
+    try:
+        with open(CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def conditional_get(url: str, parser_version: str,
+                    headers: Optional[Dict] = None) -> Tuple[requests.Response, Optional[List[Dict]]]:
+    """
+    GET url, sending the validators saved by the last scrape of it
+
+    Only entries saved with the same parser_version are used. Returns
+    (response, cached_events) - cached_events is the event list from the
+    last scrape when the server answered 304 Not Modified, otherwise None
+    """
+    # Debug runs always fetch the full page so there's HTML to save
+    entry = None
+    if not DEBUG:
+        with _cache_lock:
+            entry = _load_cache().get(url)
+        if entry and entry.get('version') != _entry_version(parser_version):
+            entry = None
+
+    request_headers = dict(headers or {})
+    if entry:
+        if entry.get('etag'):
+            request_headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            request_headers['If-Modified-Since'] = entry['last_modified']
+
+    response = SESSION.get(url, headers=request_headers, timeout=TIMEOUT)
+    if response.status_code == 304 and entry:
+        return response, entry['events']
+
+    return response, None
+
+
+def save_cached_events(url: str, parser_version: str, response: requests.Response, events: List[Dict]):
+    """Remember the response's validators and the events parsed from it"""
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+
+    # Nothing to revalidate against, and an empty result is more likely a
+    # parsing problem than a page worth pinning
+    if not (etag or last_modified) or not events:
+        return
+
+    with _cache_lock:
+        cache = _load_cache()
+        cache[url] = {
+            'version': _entry_version(parser_version),
+            'etag': etag,
+            'last_modified': last_modified,
+            'events': events,
+        }
+
+        # Write atomically so a concurrent or interrupted run never sees a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(CACHE_FILE) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, CACHE_FILE)
+        except OSError as e:
+            print(f"  ⚠ Could not save scraper cache: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
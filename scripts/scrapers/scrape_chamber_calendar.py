@@ -4,12 +4,84 @@ Scraper for Louisville Colorado Chamber of Commerce calendar
 URL: https://business.louisvillechamber.com/chambercalendar
 """
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree, html
 from datetime import datetime, timedelta
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import json
 
+from _dates import parse_iso_datetime
+from _http import DEBUG, conditional_get, save_cached_events, source_version
+
+# Cached events are only reused while this file is unchanged
+_CACHE_VERSION = source_version(__file__)
+
+# Date/time patterns, compiled once since they run for every event
+# "DAY Month DD H:MM AM/PM", e.g. "THU January 15 9:00 AM"
+_DT_RE = re.compile(r'(?:\w{3}\s+)?(\w+)\s+(\d+)(?:,?\s+(\d{4}))?\s+(\d+):(\d+)\s*(AM|PM)?', re.IGNORECASE)
+# "DAY Month DD" or "Month DD"
+_DATE_RE = re.compile(r'(?:\w{3}\s+)?(\w+)\s+(\d+)(?:,?\s+(\d{4}))?', re.IGNORECASE)
+
+# schema.org startDate: "M/D/YYYY", optionally followed by "H:MM[:SS] AM/PM"
+_SCHEMA_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})(?:\s+(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?\s+(AM|PM))?', re.IGNORECASE | re.ASCII)
+
+# Street addresses, e.g. "824 Main St"
+_ADDR_RE = re.compile(r'\d+\s+[\w\s]+(?:street|st|avenue|ave|road|rd|drive|dr|way|boulevard|blvd|lane|ln|court|ct|place|pl)', re.IGNORECASE)
+
+# Major events: Feel Good Festival, Taste of Louisville, Pints in the Park, etc.
+_MAJOR_RE = re.compile(r'festival|taste of louisville|pints in the park|golf scramble|awards dinner|summerfest', re.IGNORECASE)
+
+# Common business names to look for (these should match businesses.yaml)
+BUSINESSES = [
+    '12Degree Brewing',
+    'Bittersweet Cafe',
+    'Moxie Bread',
+    'Shopey\'s Pizza',
+    'Louisville Center for the Arts'
+]
+# One case-insensitive scan for all of them, mapped back to the canonical name
+_BUSINESS_RE = re.compile('|'.join(re.escape(business) for business in BUSINESSES), re.IGNORECASE)
+_BUSINESS_NAMES = {business.lower(): business for business in BUSINESSES}
+
+# Month names and abbreviations -> two-digit month number
+_MONTHS = {
+    'jan': '01', 'january': '01',
+    'feb': '02', 'february': '02',
+    'mar': '03', 'march': '03',
+    'apr': '04', 'april': '04',
+    'may': '05',
+    'jun': '06', 'june': '06',
+    'jul': '07', 'july': '07',
+    'aug': '08', 'august': '08',
+    'sep': '09', 'september': '09',
+    'oct': '10', 'october': '10',
+    'nov': '11', 'november': '11',
+    'dec': '12', 'december': '12'
+}
+
+# Year for dates that don't include one - set once per scrape by
+# scrape_chamber_calendar() rather than reading the clock for every event
+_DEFAULT_YEAR = None
+
+
+def _has_class(name: str) -> str:
+    """XPath test for an element whose class attribute includes name, like CSS .name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# XPath queries, compiled once since most of them run for every event
+# Event containers: gz-list-col, gz-grid-col, or gz-calendar-col
+_EVENT_ITEMS_XPATH = etree.XPath(f"//*[{_has_class('gz-list-col')} or {_has_class('gz-grid-col')} or {_has_class('gz-calendar-col')}]")
+_ALT_EVENT_ITEMS_XPATH = etree.XPath("//*[contains(@class, 'gz-') and contains(@class, '-col')]")
+_TITLE_XPATH = etree.XPath(f".//a[{_has_class('gz-card-title')}]")
+# Month, day and time elements together, so one walk of the item finds all three
+_DATE_PARTS_XPATH = etree.XPath(f".//*[{_has_class('gz-start-dt')} or {_has_class('gz-start-dy')} or (self::h5 and {_has_class('gz-event-card-time')})]")
+_SCHEMA_DATE_XPATH = etree.XPath(".//meta[@itemprop='startDate']")
+_LOCATION_XPATH = etree.XPath(f".//*[{_has_class('gz-location')} or {_has_class('gz-venue')} or contains(@class, 'location')]")
+_DESCRIPTION_XPATH = etree.XPath(f".//*[{_has_class('gz-description')} or {_has_class('gz-event-description')} or self::p]")
+# Visible text - everything but script/style contents (comments aren't text nodes)
+_TEXT_XPATH = etree.XPath(".//text()[not(parent::script or parent::style)]")
+
 
 def scrape_chamber_calendar() -> List[Dict]:
     """
@@ -17,38 +89,37 @@ def scrape_chamber_calendar() -> List[Dict]:
 
     Returns list of events in the standard format
     """
+    global _DEFAULT_YEAR
+    _DEFAULT_YEAR = datetime.now().year
+
     url = "https://business.louisvillechamber.com/chambercalendar"
 
     events = []
 
     try:
-        # Use proper headers
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive'
-        }
-
         print(f"  Fetching: {url}")
-        response = requests.get(url, headers=headers, timeout=15)
+        response, cached_events = conditional_get(url, _CACHE_VERSION)
+        if cached_events is not None:
+            print(f"  ✓ Page not modified, reusing {len(cached_events)} cached events")
+            return cached_events
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-
         # Save HTML for debugging
-        debug_file = '/tmp/chamber_calendar_debug.html'
-        with open(debug_file, 'w', encoding='utf-8') as f:
-            f.write(soup.prettify())
-        print(f"  Debug HTML saved to: {debug_file}")
+        if DEBUG:
+            debug_file = '/tmp/chamber_calendar_debug.html'
+            with open(debug_file, 'wb') as f:
+                f.write(response.content)
+            print(f"  Debug HTML saved to: {debug_file}")
+
+        tree = html.fromstring(response.content)
 
         # Find event containers
         # Based on WebFetch analysis: gz-list-col, gz-grid-col, or gz-calendar-col
-        event_items = soup.select('.gz-list-col, .gz-grid-col, .gz-calendar-col')
+        event_items = _EVENT_ITEMS_XPATH(tree)
 
         if not event_items:
             print(f"  ⚠ No events found with standard selectors, trying alternatives...")
-            event_items = soup.select('[class*="gz-"][class*="-col"]')
+            event_items = _ALT_EVENT_ITEMS_XPATH(tree)
 
         print(f"  Found {len(event_items)} event items")
 
@@ -62,6 +133,7 @@ def scrape_chamber_calendar() -> List[Dict]:
                 continue
 
         print(f"  ✓ Scraped {len(events)} events from Chamber calendar")
+        save_cached_events(url, _CACHE_VERSION, response, events)
 
     except requests.exceptions.RequestException as e:
         print(f"  ✗ Error fetching Chamber calendar: {e}")
@@ -73,37 +145,56 @@ def scrape_chamber_calendar() -> List[Dict]:
     return events
 
 
+def first_match(xpath: etree.XPath, item):
+    """First element matched by xpath under item, or None"""
+    matches = xpath(item)
+    return matches[0] if matches else None
+
+
+def element_text(elem) -> str:
+    """Text of an element with each piece stripped, like BeautifulSoup's get_text(strip=True)"""
+    if elem is None:
+        return ""
+    return ''.join(text.strip() for text in _TEXT_XPATH(elem))
+
+
+def date_parts_text(item) -> Tuple[str, str, str]:
+    """Month, day and time text of an event item (first of each, like select_one)"""
+    month_elem = day_elem = time_elem = None
+
+    for elem in _DATE_PARTS_XPATH(item):
+        classes = elem.get('class', '').split()
+        if month_elem is None and 'gz-start-dt' in classes:
+            month_elem = elem
+        if day_elem is None and 'gz-start-dy' in classes:
+            day_elem = elem
+        if time_elem is None and elem.tag == 'h5' and 'gz-event-card-time' in classes:
+            time_elem = elem
+
+    return element_text(month_elem), element_text(day_elem), element_text(time_elem)
+
+
 def parse_event_item(item, base_url: str) -> Optional[Dict]:
     """
     Parse a single event item from the HTML
     """
     try:
         # Extract title from link
-        title_elem = item.select_one('a.gz-card-title')
-        if not title_elem:
+        title_elem = first_match(_TITLE_XPATH, item)
+        if title_elem is None:
             return None
-        title = title_elem.get_text(strip=True)
+        title = element_text(title_elem)
 
         # Extract event URL
-        event_url = ""
-        if title_elem.has_attr('href'):
-            event_url = title_elem['href']
-
-        # Extract date components
-        month_elem = item.select_one('.gz-start-dt')
-        day_elem = item.select_one('.gz-start-dy')
-
-        month_text = month_elem.get_text(strip=True) if month_elem else ""
-        day_text = day_elem.get_text(strip=True) if day_elem else ""
+        event_url = title_elem.get('href', "")
 
-        # Extract time
-        time_elem = item.select_one('h5.gz-event-card-time')
-        time_text = time_elem.get_text(strip=True) if time_elem else ""
+        # Extract date components and time
+        month_text, day_text, time_text = date_parts_text(item)
 
         # Try to use the schema.org datetime first
-        schema_date_elem = item.select_one('meta[itemprop="startDate"]')
-        if schema_date_elem and schema_date_elem.has_attr('content'):
-            datetime_text = schema_date_elem['content']
+        schema_date_elem = first_match(_SCHEMA_DATE_XPATH, item)
+        if schema_date_elem is not None and schema_date_elem.get('content') is not None:
+            datetime_text = schema_date_elem.get('content')
             event_time = parse_schema_datetime(datetime_text)
         else:
             # Combine date and time for parsing
@@ -118,19 +209,14 @@ def parse_event_item(item, base_url: str) -> Optional[Dict]:
                 return None
 
         # Extract location
-        location_elem = item.select_one('.gz-location, .gz-venue, [class*="location"]')
-        location = location_elem.get_text(strip=True) if location_elem else "Louisville, CO"
+        location_elem = first_match(_LOCATION_XPATH, item)
+        location = element_text(location_elem) if location_elem is not None else "Louisville, CO"
 
         # Extract description
-        desc_elem = item.select_one('.gz-description, .gz-event-description, p')
-        description = desc_elem.get_text(strip=True) if desc_elem else ""
+        description = element_text(first_match(_DESCRIPTION_XPATH, item))
 
         # Determine if it's a major event
-        # Major events: Feel Good Festival, Taste of Louisville, Pints in the Park, etc.
-        is_major = any(keyword in title.lower() for keyword in [
-            'festival', 'taste of louisville', 'pints in the park',
-            'golf scramble', 'awards dinner', 'summerfest'
-        ])
+        is_major = bool(_MAJOR_RE.search(title))
 
         # Try to match with known businesses
         related_business = match_related_business(title, description, location)
@@ -156,30 +242,39 @@ def parse_event_item(item, base_url: str) -> Optional[Dict]:
 def parse_schema_datetime(datetime_text: str) -> Optional[str]:
     """
     Parse schema.org datetime format
-    Example: "1/15/2026 9:00:00 AM"
+    Example: "1/15/2026 9:00:00 AM", "1/15/2026 9:00 AM" or "1/15/2026"
     """
     if not datetime_text:
         return None
 
-    try:
-        # Try various formats
-        formats = [
-            '%m/%d/%Y %I:%M:%S %p',  # 1/15/2026 9:00:00 AM
-            '%m/%d/%Y %I:%M %p',     # 1/15/2026 9:00 AM
-            '%m/%d/%Y',              # 1/15/2026
-        ]
-
-        for fmt in formats:
-            try:
-                dt = datetime.strptime(datetime_text, fmt)
-                return dt.isoformat()
-            except:
-                continue
+    match = _SCHEMA_RE.fullmatch(datetime_text)
+    if not match:
+        # Not the calendar's usual format - accept ISO 8601 as well
+        if '-' not in datetime_text and 'T' not in datetime_text:
+            return None
+        try:
+            return parse_iso_datetime(datetime_text).isoformat()
+        except ValueError:
+            return None
 
-    except Exception as e:
-        print(f"  ⚠ Error parsing schema datetime: {e}")
+    month, day, year, hour, minute, second, meridiem = match.groups()
 
-    return None
+    # Build a datetime so out-of-range values (e.g. 2/30) are rejected
+    try:
+        if hour is None:
+            dt = datetime(int(year), int(month), int(day))
+        else:
+            hour_int = int(hour)
+            if not 1 <= hour_int <= 12:
+                return None
+            hour_int %= 12
+            if meridiem.upper() == 'PM':
+                hour_int += 12
+            dt = datetime(int(year), int(month), int(day), hour_int, int(minute), int(second or 0))
+    except ValueError:
+        return None
+
+    return dt.isoformat()
 
 
 def parse_datetime(datetime_text: str) -> Optional[str]:
@@ -195,21 +290,18 @@ def parse_datetime(datetime_text: str) -> Optional[str]:
 
     # Try ISO format first
     try:
-        dt = datetime.fromisoformat(datetime_text.replace('Z', '+00:00'))
-        return dt.isoformat()
+        return parse_iso_datetime(datetime_text).isoformat()
     except:
         pass
 
     # Pattern: "DAY Month DD H:MM AM/PM"
-    # Example: "THU January 15 9:00 AM"
-    pattern = r'(?:\w{3}\s+)?(\w+)\s+(\d+)(?:,?\s+(\d{4}))?\s+(\d+):(\d+)\s*(AM|PM)?'
-    match = re.search(pattern, datetime_text, re.IGNORECASE)
+    match = _DT_RE.search(datetime_text)
 
     if match:
         try:
             month_name = match.group(1)
             day = match.group(2).zfill(2)
-            year = match.group(3) if match.group(3) else str(datetime.now().year)
+            year = match.group(3) if match.group(3) else str(_DEFAULT_YEAR or datetime.now().year)
             hour = match.group(4)
             minute = match.group(5)
             meridiem = match.group(6)
@@ -232,14 +324,13 @@ def parse_date_only(date_text: str) -> Optional[str]:
         return None
 
     # Pattern: "DAY Month DD" or "Month DD"
-    pattern = r'(?:\w{3}\s+)?(\w+)\s+(\d+)(?:,?\s+(\d{4}))?'
-    match = re.search(pattern, date_text, re.IGNORECASE)
+    match = _DATE_RE.search(date_text)
 
     if match:
         try:
             month_name = match.group(1)
             day = match.group(2).zfill(2)
-            year = match.group(3) if match.group(3) else str(datetime.now().year)
+            year = match.group(3) if match.group(3) else str(_DEFAULT_YEAR or datetime.now().year)
 
             month = month_to_num(month_name)
 
@@ -253,21 +344,7 @@ def parse_date_only(date_text: str) -> Optional[str]:
 
 def month_to_num(month_name: str) -> str:
     """Convert month name to number"""
-    months = {
-        'jan': '01', 'january': '01',
-        'feb': '02', 'february': '02',
-        'mar': '03', 'march': '03',
-        'apr': '04', 'april': '04',
-        'may': '05',
-        'jun': '06', 'june': '06',
-        'jul': '07', 'july': '07',
-        'aug': '08', 'august': '08',
-        'sep': '09', 'september': '09',
-        'oct': '10', 'october': '10',
-        'nov': '11', 'november': '11',
-        'dec': '12', 'december': '12'
-    }
-    return months.get(month_name.lower(), '01')
+    return _MONTHS.get(month_name.lower(), '01')
 
 
 def convert_to_24h(hour: str, minute: str, meridiem: Optional[str]) -> str:
@@ -292,8 +369,7 @@ def extract_address(location: str, description: str) -> str:
     text = f"{location} {description}".lower()
 
     # Look for street addresses
-    address_pattern = r'\d+\s+[\w\s]+(?:street|st|avenue|ave|road|rd|drive|dr|way|boulevard|blvd|lane|ln|court|ct|place|pl)'
-    match = re.search(address_pattern, text, re.IGNORECASE)
+    match = _ADDR_RE.search(text)
 
     if match:
         address = match.group(0)
@@ -310,20 +386,11 @@ def match_related_business(title: str, description: str, location: str) -> Optio
     """
     Try to match events with known businesses
     """
-    # Common business names to look for (these should match businesses.yaml)
-    businesses = [
-        '12Degree Brewing',
-        'Bittersweet Cafe',
-        'Moxie Bread',
-        'Shopey\'s Pizza',
-        'Louisville Center for the Arts'
-    ]
-
-    text = f"{title} {description} {location}".lower()
-
-    for business in businesses:
-        if business.lower() in text:
-            return business
+    text = f"{title} {description} {location}"
+
+    match = _BUSINESS_RE.search(text)
+    if match:
+        return _BUSINESS_NAMES[match.group(0).lower()]
 
     return None
 
@@ -3,25 +3,30 @@
 Scrape events from Eventbrite for Louisville, Colorado
 Searches for events at The Louisville Underground venue
 """
-import json
 import re
 from datetime import datetime
 from typing import List, Dict, Optional
-import requests
-from bs4 import BeautifulSoup
+import orjson
+from lxml import etree, html
 
+from _dates import parse_iso_datetime
+from _http import DEBUG, conditional_get, save_cached_events, source_version
 
-def parse_eventbrite_date(date_str: str) -> Optional[str]:
+# Cached events are only reused while this file is unchanged
+_CACHE_VERSION = source_version(__file__)
+
+# Contents of the page's JSON-LD blocks, as plain str (orjson rejects
+# lxml's "smart" str subclass)
+_JSON_LD_XPATH = etree.XPath('//script[@type="application/ld+json"]/text()', smart_strings=False)
+
+
+def parse_eventbrite_date(date_str: str) -> Optional[datetime]:
     """
     Parse Eventbrite ISO 8601 datetime string
     """
     try:
         # Eventbrite uses ISO 8601 format
-        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        # Remove timezone for consistency
-        if dt.tzinfo:
-            dt = dt.replace(tzinfo=None)
-        return dt.isoformat()
+        return parse_iso_datetime(date_str)
     except Exception as e:
         print(f"  ⚠ Could not parse date '{date_str}': {e}")
         return None
@@ -40,18 +45,37 @@ def scrape_eventbrite() -> List[Dict]:
 
     try:
         headers = {'User-Agent': 'Louisville-Kiosk/1.0'}
-        response = requests.get(url, headers=headers, timeout=15)
+        response, cached_events = conditional_get(url, _CACHE_VERSION, headers=headers)
+        if cached_events is not None:
+            print(f"  ✓ Page not modified, reusing {len(cached_events)} cached events")
+            return cached_events
         response.raise_for_status()
 
+        # Save HTML for debugging
+        if DEBUG:
+            debug_file = '/tmp/eventbrite_debug.html'
+            with open(debug_file, 'wb') as f:
+                f.write(response.content)
+            print(f"  Debug HTML saved to: {debug_file}")
+
         # Parse HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = html.fromstring(response.content)
 
         # Find JSON-LD structured data
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
+        json_ld_scripts = _JSON_LD_XPATH(tree)
+
+        # URLs / @ids of events already handled - the same event is often
+        # embedded in more than one JSON-LD block
+        seen_events = set()
 
         for script in json_ld_scripts:
+            # Skip blocks with no events (BreadcrumbList, Organization, ...)
+            # without running them through the JSON parser
+            if '"Event"' not in script and '"ItemList"' not in script:
+                continue
+
             try:
-                data = json.loads(script.string)
+                data = orjson.loads(script)
 
                 # Handle both single event and list of events
                 event_list = []
@@ -72,6 +96,11 @@ def scrape_eventbrite() -> List[Dict]:
                     if not isinstance(event_data, dict) or event_data.get('@type') != 'Event':
                         continue
 
+                    # Skip duplicates before doing any parsing work
+                    event_key = event_data.get('url') or event_data.get('@id')
+                    if event_key and event_key in seen_events:
+                        continue
+
                     # Extract event details
                     name = event_data.get('name')
                     if not name:
@@ -82,10 +111,13 @@ def scrape_eventbrite() -> List[Dict]:
                     if not start_date:
                         continue
 
-                    event_time = parse_eventbrite_date(start_date)
-                    if not event_time:
+                    start_dt = parse_eventbrite_date(start_date)
+                    if start_dt is None:
                         continue
 
+                    # Remove timezone for consistency
+                    event_time = start_dt.replace(tzinfo=None).isoformat()
+
                     # If time is midnight (00:00:00), default to 7:00 PM
                     if event_time.endswith('T00:00:00'):
                         event_time = event_time.replace('T00:00:00', 'T19:00:00')
@@ -95,8 +127,7 @@ def scrape_eventbrite() -> List[Dict]:
                     end_date = event_data.get('endDate')
                     if end_date:
                         try:
-                            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+                            end_dt = parse_iso_datetime(end_date)
                             duration = int((end_dt - start_dt).total_seconds() / 60)
                         except:
                             pass
@@ -112,6 +143,12 @@ def scrape_eventbrite() -> List[Dict]:
                         if location_data.get('address'):
                             addr = location_data['address']
                             if isinstance(addr, dict):
+                                # Skip events not in Louisville, CO before building the address
+                                locality = (addr.get('addressLocality') or '').strip().lower()
+                                region = (addr.get('addressRegion') or '').strip().lower()
+                                if locality != 'louisville' or region not in ('co', 'colorado'):
+                                    continue
+
                                 # Build address from components
                                 parts = []
                                 if addr.get('streetAddress'):
@@ -125,16 +162,19 @@ def scrape_eventbrite() -> List[Dict]:
                                 if parts:
                                     address = ', '.join(parts)
                             elif isinstance(addr, str):
+                                # Skip events not in Louisville, CO
+                                addr_lower = addr.lower()
+                                if 'louisville' not in addr_lower or 'co' not in addr_lower:
+                                    continue
                                 address = addr
 
                     # Skip online-only events
-                    if not location_name or 'online' in location_name.lower():
+                    if not location_name:
                         continue
-                    if not address:
+                    location_lower = location_name.lower()
+                    if 'online' in location_lower:
                         continue
-
-                    # Skip events not in Louisville, CO
-                    if 'louisville' not in address.lower() or 'co' not in address.lower():
+                    if not address:
                         continue
 
                     # Get event URL
@@ -154,7 +194,6 @@ def scrape_eventbrite() -> List[Dict]:
 
                     # Try to match venue to known businesses
                     related_business = None
-                    location_lower = location_name.lower()
                     if 'louisville underground' in location_lower:
                         related_business = 'The Louisville Underground'
                     # Add more venue mappings as needed
@@ -174,14 +213,18 @@ def scrape_eventbrite() -> List[Dict]:
                     }
 
                     events.append(event)
+                    if event_key:
+                        seen_events.add(event_key)
                     print(f"  ✓ {name}")
 
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 continue
             except Exception as e:
                 print(f"  ⚠ Error parsing event: {e}")
                 continue
 
+        save_cached_events(url, _CACHE_VERSION, response, events)
+
     except Exception as e:
         print(f"  ✗ Error scraping Eventbrite: {e}")
         import traceback